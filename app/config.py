@@ -24,6 +24,27 @@ SMART_RESIZE = True
 MAX_BATCH_SIZE = 1
 ENABLE_GPU = False  # Force CPU in Docker
 
+# Request scheduling configuration
+SMALL_JOB_MAX_PIXELS = int(os.getenv("SMALL_JOB_MAX_PIXELS", 1920 * 1080))  # Up to Full HD uses the small lane
+SMALL_LANE_WORKERS = int(os.getenv("SMALL_LANE_WORKERS", 2))  # Max in-flight jobs per lane
+LARGE_LANE_WORKERS = int(os.getenv("LARGE_LANE_WORKERS", 2))
+DEADLINE_HEADER = "X-Request-Deadline"  # Seconds the client is willing to wait
+DEFAULT_REQUEST_DEADLINE = float(os.getenv("DEFAULT_REQUEST_DEADLINE", 0))  # 0 = no deadline
+DISCONNECT_POLL_INTERVAL = 0.1  # Seconds between client disconnect checks
+# Aging: each second waited offsets this many pixels of cost, so a 16MP panorama
+# is passed over by newer small images for at most ~8s; 0 = no aging
+JOB_AGING_PIXELS_PER_SECOND = float(os.getenv("JOB_AGING_PIXELS_PER_SECOND", 2_000_000))
+
+# Pipeline configuration - worker threads per stage and bounded queue size
+# YOLO and EasyOCR calls are serialized per model, so detect/recognize gain
+# little from more than one worker; decode and crop scale with workers
+DECODE_WORKERS = int(os.getenv("DECODE_WORKERS", 1))
+DETECT_WORKERS = int(os.getenv("DETECT_WORKERS", 1))
+CROP_WORKERS = int(os.getenv("CROP_WORKERS", 1))
+RECOGNIZE_WORKERS = int(os.getenv("RECOGNIZE_WORKERS", 1))
+STAGE_QUEUE_SIZE = int(os.getenv("STAGE_QUEUE_SIZE", 2))
+STAGE_STATS_WINDOW = float(os.getenv("STAGE_STATS_WINDOW", 60))  # Seconds of history behind utilization
+
 # Paths
 BASE_DIR = Path(__file__).parent.parent
 UPLOAD_DIR = BASE_DIR / "uploads"
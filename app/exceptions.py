@@ -18,4 +18,12 @@ class FileSizeError(APIException):
 
 class ProcessingError(APIException):
     def __init__(self, message: str = "Processing failed"):
-        super().__init__(message, 500)
\ No newline at end of file
+        super().__init__(message, 500)
+
+class RequestTimeoutError(APIException):
+    def __init__(self, message: str = "Request deadline exceeded"):
+        super().__init__(message, 408)
+
+class RequestCancelledError(APIException):
+    def __init__(self, message: str = "Request cancelled by client"):
+        super().__init__(message, 499)
\ No newline at end of file
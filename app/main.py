@@ -1,13 +1,14 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
 import logging
 import time
 import psutil
 import os
-from .predict import predict_plate
+from .scheduler import scheduler, parse_deadline
+from .pipeline import pipeline
 from .utils import validate_image
+from .config import DEADLINE_HEADER
 from .exceptions import APIException
 
 # Configure logging
@@ -24,11 +25,16 @@ app = FastAPI(
 )
 
 # Middleware for large file uploads
-class LargeUploadMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        request.scope["client_max_size"] = 30 * 1024 * 1024  # 30MB
-        response = await call_next(request)
-        return response
+# Plain ASGI rather than BaseHTTPMiddleware: wrapping receive there hides
+# client disconnects from request.is_disconnected(), which the scheduler polls
+class LargeUploadMiddleware:
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            scope["client_max_size"] = 30 * 1024 * 1024  # 30MB
+        await self.app(scope, receive, send)
 
 app.add_middleware(LargeUploadMiddleware)
 
@@ -51,6 +57,9 @@ async def startup_event():
         
         # Pre-load models (optional - they'll load on first request if not)
         # model_manager._load_models()
+        
+        pipeline.start()
+        scheduler.start()
         logger.info("Application startup complete")
     except Exception as e:
         logger.error(f"Startup error: {e}")
@@ -107,11 +116,13 @@ async def system_info():
     return {
         "cpu_percent": psutil.cpu_percent(),
         "memory": memory_info,
-        "device": "cpu"
+        "device": "cpu",
+        "scheduler": scheduler.get_stats(),
+        "pipeline": pipeline.get_stats()
     }
 
 @app.post("/predict")
-async def predict(file: UploadFile = File(...)):
+async def predict(request: Request, file: UploadFile = File(...)):
     """License plate prediction endpoint"""
     start_time = time.time()
     
@@ -119,10 +130,13 @@ async def predict(file: UploadFile = File(...)):
         if not file.filename:
             raise APIException("No file provided", 400)
         
+        deadline = parse_deadline(request.headers.get(DEADLINE_HEADER), start_time)
+        
         image_bytes = await file.read()
-        validate_image(image_bytes, file.filename)
+        width, height = validate_image(image_bytes, file.filename)
         
-        plates = predict_plate(image_bytes)
+        # Scheduled by image size; abandoned or expired requests are dropped
+        plates = await scheduler.run(request, image_bytes, width, height, deadline)
         processing_time = time.time() - start_time
         
         logger.info(
@@ -2,7 +2,10 @@ import os
 import logging
 import psutil
 import gc
+import threading
+import time
 import torch
+from contextlib import contextmanager
 
 # Set environment variables for headless operation
 os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
@@ -19,6 +22,11 @@ class ModelManager:
         self.ocr_reader = None
         self.device = "cpu"
         self._models_loaded = False
+        # YOLO and EasyOCR are not thread-safe; pipeline stage workers serialize on these
+        self.model_lock = threading.Lock()
+        self.ocr_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._lock_wait = threading.local()
         logger.info("ModelManager initialized")
     
     def _load_models(self):
@@ -86,16 +94,34 @@ class ModelManager:
             logger.error(f"Failed to load EasyOCR: {e}")
             raise ModelLoadError(f"Failed to load EasyOCR: {str(e)}")
     
-    def get_model(self):
+    @contextmanager
+    def acquire(self, lock: threading.Lock):
+        """Hold a model lock, recording how long this thread waited for it"""
+        started = time.perf_counter()
+        with lock:
+            waited = time.perf_counter() - started
+            self._lock_wait.seconds = getattr(self._lock_wait, "seconds", 0.0) + waited
+            yield
+    
+    def pop_lock_wait(self) -> float:
+        """Return and reset the lock wait time accumulated by the calling thread"""
+        waited = getattr(self._lock_wait, "seconds", 0.0)
+        self._lock_wait.seconds = 0.0
+        return waited
+    
+    def _ensure_loaded(self):
         if not self._models_loaded:
-            self._load_models()
+            with self._load_lock:
+                self._load_models()
+    
+    def get_model(self):
+        self._ensure_loaded()
         if self.model is None:
             raise ModelLoadError("YOLO model not loaded")
         return self.model
     
     def get_ocr_reader(self):
-        if not self._models_loaded:
-            self._load_models()
+        self._ensure_loaded()
         if self.ocr_reader is None:
             raise ModelLoadError("OCR reader not loaded")
         return self.ocr_reader
@@ -0,0 +1,254 @@
+# app/pipeline.py
+import itertools
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .config import (
+    DECODE_WORKERS, DETECT_WORKERS, CROP_WORKERS, RECOGNIZE_WORKERS,
+    STAGE_QUEUE_SIZE, STAGE_STATS_WINDOW
+)
+from .exceptions import APIException, ProcessingError
+from .model import model_manager
+from .predict import decode_image, detect_plates, crop_plates, recognize_plates
+from .utils import cleanup_memory
+
+logger = logging.getLogger(__name__)
+
+class PipelineTask:
+    """State carried through the stages for one scheduler job"""
+
+    def __init__(self, job):
+        self.job = job
+        self.image_np = None
+        self.scale_factor = 1.0
+        self.detections: List[Dict[str, Any]] = []
+        self.crops: List[Dict[str, Any]] = []
+        self.plates: List[Dict[str, Any]] = []
+        self.error: Optional[APIException] = None
+        self.done = threading.Event()
+
+    def finish(self, error: Optional[APIException] = None):
+        self.error = error
+        self.done.set()
+
+class _Window:
+    """Time intervals spent on one activity, kept for the last STAGE_STATS_WINDOW seconds"""
+
+    def __init__(self):
+        self._intervals: "deque[Tuple[float, float, float]]" = deque()
+
+    def add(self, start: float, end: float, weight: float = 1.0):
+        self._intervals.append((start, end, weight))
+        cutoff = end - STAGE_STATS_WINDOW
+        while self._intervals and self._intervals[0][1] < cutoff:
+            self._intervals.popleft()
+
+    def total(self, window_start: float) -> float:
+        """Weighted time overlapping [window_start, now]"""
+        return sum(
+            max(0.0, end - max(start, window_start)) * weight
+            for start, end, weight in self._intervals
+        )
+
+class Stage:
+    """
+    One pipeline step with its own worker threads and a bounded input queue
+    Queues use the scheduler's aged job priority so small images go first
+    between stages without starving large ones
+    """
+
+    def __init__(self, name: str, fn: Callable[[PipelineTask], None], workers: int):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.next_stage: Optional["Stage"] = None
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue(maxsize=max(1, STAGE_QUEUE_SIZE))
+        self._counter = itertools.count()
+        self._stats_lock = threading.Lock()
+        self._busy_time = 0.0
+        self._lock_wait_time = 0.0
+        self._blocked_time = 0.0
+        self._processed = 0
+        self._started_at: Optional[float] = None
+        # Recent activity for utilization, plus what each worker is doing right now
+        self._busy_window = _Window()
+        self._lock_wait_window = _Window()
+        self._blocked_window = _Window()
+        self._active: Dict[int, Tuple[str, float]] = {}
+
+    def start(self):
+        self._started_at = time.perf_counter()
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._worker, name=f"{self.name}-stage-{i}", daemon=True
+            )
+            thread.start()
+
+    def put(self, task: PipelineTask):
+        # Blocks when the stage is full, pushing back on the stage before it
+        self._queue.put((task.job.priority, next(self._counter), task))
+
+    def _worker(self):
+        while True:
+            _, _, task = self._queue.get()
+            try:
+                # Drop expired or abandoned jobs at every stage boundary
+                task.job.checkpoint()
+
+                model_manager.pop_lock_wait()
+                started = self._begin("busy")
+                try:
+                    self.fn(task)
+                finally:
+                    ended = time.perf_counter()
+                    elapsed = ended - started
+                    # Waiting on a model lock held by another worker is not work
+                    lock_wait = min(model_manager.pop_lock_wait(), elapsed)
+                    lock_share = lock_wait / elapsed if elapsed > 0 else 0.0
+                    with self._stats_lock:
+                        self._active.pop(threading.get_ident(), None)
+                        self._busy_time += elapsed - lock_wait
+                        self._lock_wait_time += lock_wait
+                        self._processed += 1
+                        self._busy_window.add(started, ended, 1.0 - lock_share)
+                        self._lock_wait_window.add(started, ended, lock_share)
+            except APIException as e:
+                task.finish(e)
+                continue
+            except Exception as e:
+                logger.error(f"Prediction error in {self.name} stage: {e}")
+                task.finish(ProcessingError(f"Prediction failed: {str(e)}"))
+                continue
+
+            if self.next_stage:
+                # Time stuck behind a full downstream queue is reported separately
+                started = self._begin("blocked")
+                try:
+                    self.next_stage.put(task)
+                finally:
+                    ended = time.perf_counter()
+                    with self._stats_lock:
+                        self._active.pop(threading.get_ident(), None)
+                        self._blocked_time += ended - started
+                        self._blocked_window.add(started, ended)
+            else:
+                task.finish()
+
+    def _begin(self, activity: str) -> float:
+        started = time.perf_counter()
+        with self._stats_lock:
+            self._active[threading.get_ident()] = (activity, started)
+        return started
+
+    def get_stats(self) -> dict:
+        """
+        Lifetime averages per task, plus utilization over the last STAGE_STATS_WINDOW
+        seconds: the share of worker time spent working, waiting on a model lock,
+        or blocked handing results to a full downstream queue
+        """
+        now = time.perf_counter()
+        window_start = max(now - STAGE_STATS_WINDOW, self._started_at or now)
+        capacity = (now - window_start) * self.workers
+
+        with self._stats_lock:
+            busy_time = self._busy_time
+            lock_wait_time = self._lock_wait_time
+            blocked_time = self._blocked_time
+            processed = self._processed
+
+            recent = {
+                "busy": self._busy_window.total(window_start),
+                "blocked": self._blocked_window.total(window_start)
+            }
+            recent_lock_wait = self._lock_wait_window.total(window_start)
+            # Count work still in progress so a stage stuck on a long task does not read idle
+            for activity, started in self._active.values():
+                recent[activity] += now - max(started, window_start)
+
+        def ratio(seconds: float) -> float:
+            return round(min(1.0, seconds / capacity), 3) if capacity > 0 else 0.0
+
+        def average_ms(seconds: float) -> float:
+            return round(seconds / processed * 1000, 1) if processed else 0.0
+
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize(),
+            "processed": processed,
+            "avg_ms": average_ms(busy_time),
+            "avg_lock_wait_ms": average_ms(lock_wait_time),
+            "avg_blocked_ms": average_ms(blocked_time),
+            "utilization": ratio(recent["busy"]),
+            "lock_wait_ratio": ratio(recent_lock_wait),
+            "blocked_ratio": ratio(recent["blocked"])
+        }
+
+def _decode(task: PipelineTask):
+    task.image_np, task.scale_factor = decode_image(task.job.image_bytes)
+
+def _detect(task: PipelineTask):
+    task.detections = detect_plates(task.image_np)
+
+def _crop(task: PipelineTask):
+    task.crops = crop_plates(task.image_np, task.detections)
+    # Full image is no longer needed once the plates are cropped
+    task.image_np = None
+
+def _recognize(task: PipelineTask):
+    task.plates = recognize_plates(task.crops, task.scale_factor, task.job.checkpoint)
+    task.crops = []
+    logger.info(f"Total plates detected: {len(task.plates)}")
+
+class Pipeline:
+    """
+    Decode -> detect -> crop -> recognize stages connected by bounded queues,
+    so detection of one image overlaps OCR of another
+    """
+
+    def __init__(self):
+        self.stages = [
+            Stage("decode", _decode, DECODE_WORKERS),
+            Stage("detect", _detect, DETECT_WORKERS),
+            Stage("crop", _crop, CROP_WORKERS),
+            Stage("recognize", _recognize, RECOGNIZE_WORKERS)
+        ]
+        for stage, next_stage in zip(self.stages, self.stages[1:]):
+            stage.next_stage = next_stage
+        self._started = False
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        with self._start_lock:
+            if self._started:
+                return
+            for stage in self.stages:
+                stage.start()
+            self._started = True
+            logger.info(
+                "Pipeline started: " +
+                ", ".join(f"{stage.name} ({stage.workers} workers)" for stage in self.stages)
+            )
+
+    def process(self, job) -> List[Dict[str, Any]]:
+        """Run a scheduler job through all stages and wait for its plates"""
+        self.start()
+
+        task = PipelineTask(job)
+        self.stages[0].put(task)
+        task.done.wait()
+
+        # Cleanup memory after processing
+        cleanup_memory()
+
+        if task.error is not None:
+            raise task.error
+        return task.plates
+
+    def get_stats(self) -> Dict[str, dict]:
+        return {stage.name: stage.get_stats() for stage in self.stages}
+
+# Global prediction pipeline
+pipeline = Pipeline()
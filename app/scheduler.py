@@ -0,0 +1,227 @@
+# app/scheduler.py
+import asyncio
+import itertools
+import logging
+import math
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from .config import (
+    SMALL_JOB_MAX_PIXELS, SMALL_LANE_WORKERS, LARGE_LANE_WORKERS,
+    DEADLINE_HEADER, DEFAULT_REQUEST_DEADLINE, DISCONNECT_POLL_INTERVAL,
+    JOB_AGING_PIXELS_PER_SECOND
+)
+from .exceptions import APIException, RequestTimeoutError, RequestCancelledError
+from .pipeline import pipeline
+
+logger = logging.getLogger(__name__)
+
+def estimate_cost(width: int, height: int) -> int:
+    """Estimate processing cost of an image from its dimensions (pixel count)"""
+    return width * height
+
+def parse_deadline(header_value: Optional[str], received_at: float) -> Optional[float]:
+    """
+    Convert the deadline header (seconds the client will wait) to an absolute time
+    Falls back to DEFAULT_REQUEST_DEADLINE; returns None when there is no deadline
+    """
+    if header_value is None:
+        budget = DEFAULT_REQUEST_DEADLINE
+    else:
+        try:
+            budget = float(header_value)
+        except ValueError:
+            raise APIException(f"Invalid {DEADLINE_HEADER} header: expected seconds", 400)
+        # nan/inf would give a deadline that never expires
+        if not math.isfinite(budget) or budget <= 0:
+            raise APIException(f"Invalid {DEADLINE_HEADER} header: must be positive", 400)
+
+    if budget <= 0:
+        return None
+    return received_at + budget
+
+class Job:
+    """A single prediction request waiting in, or running on, a scheduler lane"""
+
+    def __init__(self, image_bytes: bytes, cost: int, deadline: Optional[float],
+                 loop: asyncio.AbstractEventLoop):
+        self.image_bytes = image_bytes
+        self.cost = cost
+        self.deadline = deadline
+        self.loop = loop
+        self.future = loop.create_future()
+        self.enqueued_at = time.time()
+        self._cancelled = threading.Event()
+
+    @property
+    def priority(self) -> float:
+        """
+        Shortest-job-first key with aging: arrival time plus cost scaled to seconds
+        Equivalent to cost minus JOB_AGING_PIXELS_PER_SECOND times the time waited,
+        but fixed at enqueue time so it works with a plain PriorityQueue.
+        JOB_AGING_PIXELS_PER_SECOND <= 0 turns aging off (pure cost ordering)
+        """
+        if JOB_AGING_PIXELS_PER_SECOND <= 0:
+            return float(self.cost)
+        return self.enqueued_at + self.cost / JOB_AGING_PIXELS_PER_SECOND
+
+    def cancel(self):
+        """Abandon the job; called from the event loop when nobody awaits it anymore"""
+        self._cancelled.set()
+        self.future.cancel()
+
+    def is_expired(self) -> bool:
+        return self.deadline is not None and time.time() > self.deadline
+
+    def checkpoint(self):
+        """Raise if the job should no longer be worked on"""
+        if self._cancelled.is_set():
+            raise RequestCancelledError()
+        if self.is_expired():
+            raise RequestTimeoutError()
+
+    def resolve(self, result: Any = None, error: Optional[BaseException] = None):
+        """Hand the result back to the event loop awaiting this job"""
+        def _apply():
+            if self.future.done():
+                return
+            if error is not None:
+                self.future.set_exception(error)
+            else:
+                self.future.set_result(result)
+
+        try:
+            self.loop.call_soon_threadsafe(_apply)
+        except RuntimeError:
+            # Event loop already closed (server shutting down)
+            pass
+
+class Lane:
+    """Shortest-job-first queue (with aging) served by its own worker threads"""
+
+    def __init__(self, name: str, workers: int, handler: Callable[[Job], Any]):
+        self.name = name
+        self.workers = max(1, workers)
+        self.handler = handler
+        self._queue: "queue.PriorityQueue" = queue.PriorityQueue()
+        self._counter = itertools.count()
+        self._threads: List[threading.Thread] = []
+        self._stats_lock = threading.Lock()
+        self.completed = 0
+        self.skipped = 0
+        self.aborted = 0
+        self.failed = 0
+
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._worker, name=f"{self.name}-lane-{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def put(self, job: Job):
+        # Counter breaks ties so equal-priority jobs stay FIFO
+        self._queue.put((job.priority, next(self._counter), job))
+
+    def _worker(self):
+        while True:
+            _, _, job = self._queue.get()
+            try:
+                job.checkpoint()
+            except APIException as e:
+                self._count("skipped")
+                logger.info(f"Skipping queued job on {self.name} lane: {e.message}")
+                job.resolve(error=e)
+                continue
+
+            try:
+                result = self.handler(job)
+                self._count("completed")
+                job.resolve(result)
+            except (RequestTimeoutError, RequestCancelledError) as e:
+                self._count("aborted")
+                logger.info(f"Aborted job on {self.name} lane: {e.message}")
+                job.resolve(error=e)
+            except Exception as e:
+                self._count("failed")
+                job.resolve(error=e)
+
+    def _count(self, outcome: str):
+        with self._stats_lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def get_stats(self) -> dict:
+        with self._stats_lock:
+            return {
+                "workers": self.workers,
+                "queued": self._queue.qsize(),
+                "completed": self.completed,
+                "skipped": self.skipped,
+                "aborted": self.aborted,
+                "failed": self.failed
+            }
+
+class RequestScheduler:
+    """
+    Routes prediction jobs to a small or large lane by estimated cost
+    so small images never queue behind huge panoramas
+    """
+
+    def __init__(self, handler: Callable[[Job], Any]):
+        self.small_lane = Lane("small", SMALL_LANE_WORKERS, handler)
+        self.large_lane = Lane("large", LARGE_LANE_WORKERS, handler)
+        self._started = False
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        with self._start_lock:
+            if self._started:
+                return
+            self.small_lane.start()
+            self.large_lane.start()
+            self._started = True
+            logger.info(
+                f"Scheduler started: small lane ({self.small_lane.workers} workers, "
+                f"<= {SMALL_JOB_MAX_PIXELS} px), large lane ({self.large_lane.workers} workers)"
+            )
+
+    def lane_for(self, cost: int) -> Lane:
+        return self.small_lane if cost <= SMALL_JOB_MAX_PIXELS else self.large_lane
+
+    async def run(self, request, image_bytes: bytes, width: int, height: int,
+                  deadline: Optional[float]) -> Any:
+        """
+        Queue a job and wait for its result, cancelling it if the client
+        disconnects or the deadline passes before it finishes
+        """
+        self.start()
+
+        job = Job(image_bytes, estimate_cost(width, height), deadline, asyncio.get_running_loop())
+        self.lane_for(job.cost).put(job)
+
+        try:
+            while True:
+                done, _ = await asyncio.wait({job.future}, timeout=DISCONNECT_POLL_INTERVAL)
+                if done:
+                    return job.future.result()
+
+                if job.is_expired():
+                    raise RequestTimeoutError()
+
+                if await request.is_disconnected():
+                    raise RequestCancelledError()
+        finally:
+            # Also covers the handler itself being cancelled (shutdown, middleware)
+            if not job.future.done():
+                job.cancel()
+
+    def get_stats(self) -> Dict[str, dict]:
+        return {
+            "small_lane": self.small_lane.get_stats(),
+            "large_lane": self.large_lane.get_stats()
+        }
+
+# Global request scheduler; lane workers bound in-flight jobs fed to the pipeline
+scheduler = RequestScheduler(pipeline.process)
@@ -14,8 +14,11 @@ from .exceptions import InvalidImageError, FileSizeError
 
 logger = logging.getLogger(__name__)
 
-def validate_image(file_content: bytes, filename: str) -> None:
-    """Validate uploaded high-resolution image file"""
+def validate_image(file_content: bytes, filename: str) -> Tuple[int, int]:
+    """
+    Validate uploaded high-resolution image file
+    Returns the (width, height) read from the header so callers can estimate cost
+    """
     
     # Check file size - 30MB limit
     if len(file_content) > MAX_FILE_SIZE:
@@ -41,6 +44,8 @@ def validate_image(file_content: bytes, filename: str) -> None:
         
         # Log image info for monitoring
         logger.info(f"Validating image: {width}x{height}, {len(file_content)/(1024*1024):.1f}MB")
+        
+        return width, height
             
     except Exception as e:
         if isinstance(e, InvalidImageError):
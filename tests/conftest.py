@@ -0,0 +1,28 @@
+import importlib
+import sys
+import types
+
+
+def _stub_if_unavailable(name, **attributes):
+    """
+    Use the real module when its dependencies import; otherwise install a stub
+    so the scheduler and pipeline tests still run without torch or PIL
+    """
+    try:
+        importlib.import_module(name)
+    except ImportError:
+        module = types.ModuleType(name)
+        module.__dict__.update(attributes)
+        sys.modules[name] = module
+
+
+_stub_if_unavailable(
+    "app.model",
+    model_manager=types.SimpleNamespace(pop_lock_wait=lambda: 0.0)
+)
+_stub_if_unavailable("app.utils", cleanup_memory=lambda: None)
+# Pipeline tests monkeypatch the stage functions imported into app.pipeline
+_stub_if_unavailable(
+    "app.predict",
+    decode_image=None, detect_plates=None, crop_plates=None, recognize_plates=None
+)
@@ -0,0 +1,132 @@
+import asyncio
+import io
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("multipart")
+pytest.importorskip("psutil")
+pytest.importorskip("PIL")
+
+from PIL import Image
+
+from app import main
+from app import pipeline as pipeline_module
+
+
+def _multipart_png(boundary):
+    buffer = io.BytesIO()
+    Image.new("RGB", (400, 400), "white").save(buffer, format="PNG")
+    return (
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="car.png"\r\n'
+        "Content-Type: image/png\r\n\r\n"
+    ).encode() + buffer.getvalue() + f"\r\n--{boundary}--\r\n".encode()
+
+
+def _predict_request():
+    boundary = "plateboundary"
+    body = _multipart_png(boundary)
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/predict",
+        "raw_path": b"/predict",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", b"testserver"),
+            (b"content-type", f"multipart/form-data; boundary={boundary}".encode()),
+            (b"content-length", str(len(body)).encode())
+        ],
+        "client": ("127.0.0.1", 1234),
+        "server": ("testserver", 80)
+    }
+    return body, scope
+
+
+def _stub_stages(monkeypatch, detect_plates, recognized):
+    monkeypatch.setattr(pipeline_module, "decode_image", lambda image_bytes: (image_bytes, 1.0))
+    monkeypatch.setattr(pipeline_module, "detect_plates", detect_plates)
+    monkeypatch.setattr(pipeline_module, "crop_plates", lambda image_np, detections: detections)
+
+    def recognize_plates(crops, scale_factor, checkpoint):
+        recognized.append(crops)
+        return [{"text": "34 A8C 12", "bbox": crop["bbox"]} for crop in crops]
+
+    monkeypatch.setattr(pipeline_module, "recognize_plates", recognize_plates)
+
+
+def test_predict_returns_plates(monkeypatch):
+    recognized = []
+    _stub_stages(
+        monkeypatch,
+        lambda image_np: [{"bbox": [0, 0, 10, 10], "confidence": 0.9}],
+        recognized
+    )
+    body, scope = _predict_request()
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(main.app(scope, receive, send))
+
+    start = next(message for message in sent if message["type"] == "http.response.start")
+    payload = b"".join(message.get("body", b"") for message in sent if message["type"] == "http.response.body")
+    assert start["status"] == 200
+    assert b'"count":1' in payload
+
+
+def test_predict_returns_499_and_drops_job_when_client_disconnects(monkeypatch):
+    detect_started = threading.Event()
+    recognized = []
+
+    def detect_plates(image_np):
+        detect_started.set()
+        time.sleep(0.3)
+        return [{"bbox": [0, 0, 10, 10], "confidence": 0.9}]
+
+    _stub_stages(monkeypatch, detect_plates, recognized)
+    body, scope = _predict_request()
+    sent = []
+
+    async def run():
+        body_sent = False
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # Client hangs up once detection is under way
+            while not detect_started.is_set():
+                await asyncio.sleep(0.01)
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        await main.app(scope, receive, send)
+
+    lane = main.scheduler.small_lane
+    aborted_before = lane.get_stats()["aborted"]
+    asyncio.run(run())
+
+    start = next(message for message in sent if message["type"] == "http.response.start")
+    assert start["status"] == 499
+
+    for _ in range(100):
+        if lane.get_stats()["aborted"] > aborted_before:
+            break
+        time.sleep(0.01)
+    assert lane.get_stats()["aborted"] == aborted_before + 1
+    assert recognized == []
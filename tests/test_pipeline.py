@@ -0,0 +1,156 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app import pipeline as pipeline_module
+from app.exceptions import RequestTimeoutError
+from app.pipeline import Pipeline
+from app.scheduler import Job
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def timeline(monkeypatch):
+    """Stub the stage functions, recording (stage, job id, start, end) per call"""
+    events = []
+    lock = threading.Lock()
+
+    def record(stage, key, seconds):
+        started = time.perf_counter()
+        time.sleep(seconds)
+        with lock:
+            events.append((stage, key, started, time.perf_counter()))
+
+    def decode_image(image_bytes):
+        return image_bytes, 1.0
+
+    def detect_plates(image_np):
+        record("detect", image_np, 0.2)
+        return [{"bbox": [0, 0, 10, 10], "confidence": 0.9}]
+
+    def crop_plates(image_np, detections):
+        return [{**detection, "crop": image_np} for detection in detections]
+
+    def recognize_plates(crops, scale_factor, checkpoint):
+        plates = []
+        for item in crops:
+            checkpoint()
+            record("recognize", item["crop"], 0.2)
+            plates.append({"text": item["crop"].decode(), "bbox": item["bbox"]})
+        return plates
+
+    monkeypatch.setattr(pipeline_module, "decode_image", decode_image)
+    monkeypatch.setattr(pipeline_module, "detect_plates", detect_plates)
+    monkeypatch.setattr(pipeline_module, "crop_plates", crop_plates)
+    monkeypatch.setattr(pipeline_module, "recognize_plates", recognize_plates)
+    # Real gc.collect() can take a while with torch loaded and skews timings
+    monkeypatch.setattr(pipeline_module, "cleanup_memory", lambda: None)
+    return events
+
+
+def test_process_returns_plates(loop, timeline):
+    pipeline = Pipeline()
+
+    plates = pipeline.process(Job(b"34ABC123", 100_000, None, loop))
+
+    assert plates == [{"text": "34ABC123", "bbox": [0, 0, 10, 10]}]
+    assert pipeline.get_stats()["recognize"]["processed"] == 1
+
+
+def test_checkpoint_aborts_between_detect_and_ocr(loop, timeline):
+    pipeline = Pipeline()
+    # Deadline passes while detection is running
+    job = Job(b"late", 100_000, time.time() + 0.1, loop)
+
+    with pytest.raises(RequestTimeoutError):
+        pipeline.process(job)
+
+    assert [event[0] for event in timeline] == ["detect"]
+
+
+def test_detection_overlaps_ocr_of_previous_job(loop, timeline):
+    pipeline = Pipeline()
+    jobs = [Job(b"first", 100_000, None, loop), Job(b"second", 100_000, None, loop)]
+    threads = []
+
+    for job in jobs:
+        thread = threading.Thread(target=pipeline.process, args=(job,))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join(timeout=5)
+
+    spans = {(stage, key): (start, end) for stage, key, start, end in timeline}
+    detect_start, detect_end = spans[("detect", b"second")]
+    ocr_start, ocr_end = spans[("recognize", b"first")]
+    assert detect_start < ocr_end and ocr_start < detect_end
+
+
+def test_utilization_excludes_model_lock_wait(loop, timeline, monkeypatch):
+    # Detect workers report that almost all of their 0.2s call was lock wait
+    def pop_lock_wait():
+        return 0.19 if threading.current_thread().name.startswith("detect") else 0.0
+
+    monkeypatch.setattr(pipeline_module.model_manager, "pop_lock_wait", pop_lock_wait)
+    pipeline = Pipeline()
+
+    pipeline.process(Job(b"plate", 100_000, None, loop))
+
+    stats = pipeline.get_stats()["detect"]
+    assert stats["avg_lock_wait_ms"] == pytest.approx(190, abs=1)
+    assert stats["avg_ms"] < 50
+
+
+def test_utilization_only_covers_recent_window(loop, timeline, monkeypatch):
+    monkeypatch.setattr(pipeline_module, "STAGE_STATS_WINDOW", 0.3)
+    pipeline = Pipeline()
+
+    pipeline.process(Job(b"plate", 100_000, None, loop))
+    # OCR just ran for 0.2s of the 0.3s window
+    busy = pipeline.get_stats()["recognize"]["utilization"]
+    time.sleep(0.4)
+    idle = pipeline.get_stats()["recognize"]
+
+    assert busy > 0.4
+    assert idle["utilization"] == 0.0
+    # Lifetime per-task averages are unaffected by idle time
+    assert idle["avg_ms"] == pytest.approx(200, abs=30)
+
+
+def test_blocked_time_reported_when_downstream_is_full(loop, timeline, monkeypatch):
+    monkeypatch.setattr(pipeline_module, "STAGE_QUEUE_SIZE", 1)
+    release = threading.Event()
+
+    def recognize_plates(crops, scale_factor, checkpoint):
+        release.wait()
+        return []
+
+    monkeypatch.setattr(pipeline_module, "recognize_plates", recognize_plates)
+    monkeypatch.setattr(pipeline_module, "detect_plates", lambda image_np: [])
+    pipeline = Pipeline()
+
+    # Recognize holds job 1 and its queue holds job 2, so crop blocks on job 3
+    threads = [
+        threading.Thread(target=pipeline.process, args=(Job(b"%d" % i, 100_000, None, loop),))
+        for i in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.3)
+    stats = pipeline.get_stats()["crop"]
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert stats["blocked_ratio"] > 0.3
+    assert stats["utilization"] < 0.1
+    assert pipeline.get_stats()["crop"]["avg_blocked_ms"] > 0
@@ -0,0 +1,125 @@
+import threading
+import types
+from contextlib import contextmanager
+
+import pytest
+
+torch = pytest.importorskip("torch")
+np = pytest.importorskip("numpy")
+pytest.importorskip("PIL")
+
+from app import predict
+from app.exceptions import RequestCancelledError
+
+
+def _box(bbox, confidence=0.9, class_id=0):
+    return types.SimpleNamespace(
+        cls=torch.tensor([float(class_id)]),
+        conf=torch.tensor([confidence]),
+        xyxy=torch.tensor([bbox], dtype=torch.float32)
+    )
+
+
+class FakeModelManager:
+    """Stands in for ModelManager with a scripted detector and OCR reader"""
+
+    def __init__(self, boxes=(), ocr_results=()):
+        self.model_lock = threading.Lock()
+        self.ocr_lock = threading.Lock()
+        self.ocr_calls = []
+        self._boxes = list(boxes)
+        self._ocr_results = list(ocr_results)
+
+    @contextmanager
+    def acquire(self, lock):
+        with lock:
+            yield
+
+    def get_model(self):
+        def model(image_np, **kwargs):
+            return [types.SimpleNamespace(boxes=self._boxes)]
+
+        model.names = {0: "plate", 1: "car"}
+        return model
+
+    def get_ocr_reader(self):
+        def readtext(crop, **kwargs):
+            self.ocr_calls.append(crop)
+            return self._ocr_results
+
+        return types.SimpleNamespace(readtext=readtext)
+
+
+@pytest.fixture
+def fake_manager(monkeypatch):
+    def install(**kwargs):
+        manager = FakeModelManager(**kwargs)
+        monkeypatch.setattr(predict, "model_manager", manager)
+        return manager
+
+    return install
+
+
+def _image(height, width):
+    # Distinct values per pixel so crops can be compared against the source
+    return np.arange(height * width * 3, dtype=np.uint32).reshape(height, width, 3).astype(np.uint8)
+
+
+def test_detect_plates_clamps_and_filters_boxes(fake_manager):
+    fake_manager(boxes=[
+        _box([-10, -5, 250, 120]),
+        _box([10, 10, 50, 30], class_id=1),
+        _box([10, 10, 50, 30], confidence=0.3)
+    ])
+
+    detections = predict.detect_plates(_image(100, 200))
+
+    assert detections == [{"bbox": [0, 0, 200, 100], "confidence": pytest.approx(0.9)}]
+
+
+def test_crop_plates_applies_adaptive_padding():
+    image_np = _image(400, 600)
+    # Padding is 1% of the short side (4px), clamped to 2..10
+    crops = predict.crop_plates(image_np, [{"bbox": [100, 100, 300, 200], "confidence": 0.9}])
+
+    assert len(crops) == 1
+    np.testing.assert_array_equal(crops[0]["crop"], image_np[96:204, 96:304])
+    assert crops[0]["bbox"] == [100, 100, 300, 200]
+
+
+def test_crop_plates_upscales_small_plates():
+    crops = predict.crop_plates(_image(400, 600), [{"bbox": [100, 100, 140, 120], "confidence": 0.9}])
+
+    # 48x28 crop is scaled by max(2, 50/28, 150/48) = 3.125
+    assert crops[0]["crop"].shape == (87, 150, 3)
+
+
+def test_recognize_plates_rescales_bbox_and_combines_confidence(fake_manager):
+    fake_manager(ocr_results=[(None, "34 abc 12", 0.9), (None, "noise", 0.2)])
+    crops = [{"bbox": [100, 50, 300, 150], "confidence": 0.8, "crop": _image(60, 160)}]
+
+    plates = predict.recognize_plates(crops, 0.5, lambda: None)
+
+    assert plates == [{
+        "text": "34 A8C 12",
+        "confidence": 0.85,
+        "bbox": [200, 100, 600, 300],
+        "detection_confidence": 0.8,
+        "ocr_confidence": 0.9
+    }]
+
+
+def test_recognize_plates_stops_when_checkpoint_raises(fake_manager):
+    manager = fake_manager(ocr_results=[(None, "34 ABC 12", 0.9)])
+    crop = {"bbox": [0, 0, 10, 10], "confidence": 0.9, "crop": _image(60, 160)}
+    calls = []
+
+    def checkpoint():
+        calls.append(None)
+        if len(calls) > 1:
+            raise RequestCancelledError()
+
+    with pytest.raises(RequestCancelledError):
+        predict.recognize_plates([crop, dict(crop), dict(crop)], 1.0, checkpoint)
+
+    assert len(manager.ocr_calls) == 1
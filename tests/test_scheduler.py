@@ -0,0 +1,191 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app import scheduler as scheduler_module
+from app.exceptions import APIException, RequestCancelledError, RequestTimeoutError
+from app.scheduler import Job, Lane, RequestScheduler, parse_deadline
+
+
+def _run_lane(jobs_and_delays, handler, workers=1):
+    """Queue jobs on a single lane while its worker is busy, then collect results"""
+    async def main():
+        loop = asyncio.get_running_loop()
+        release = threading.Event()
+        order = []
+
+        def gated_handler(job):
+            release.wait()
+            order.append(job)
+            return handler(job)
+
+        lane = Lane("test", workers, gated_handler)
+        lane.start()
+
+        # First job occupies the worker so the rest queue up
+        blocker = Job(b"", 0, None, loop)
+        lane.put(blocker)
+        await asyncio.sleep(0.05)
+
+        jobs = []
+        for job_args, enqueued_offset in jobs_and_delays:
+            job = Job(b"", *job_args, loop)
+            job.enqueued_at += enqueued_offset
+            lane.put(job)
+            jobs.append(job)
+
+        release.set()
+        results = await asyncio.gather(
+            *(job.future for job in jobs), return_exceptions=True
+        )
+        return lane, [job for job in order if job is not blocker], jobs, results
+
+    return asyncio.run(main())
+
+
+def test_lane_for_routes_by_pixel_count():
+    scheduler = RequestScheduler(lambda job: None)
+
+    assert scheduler.lane_for(320 * 320) is scheduler.small_lane
+    assert scheduler.lane_for(1920 * 1080) is scheduler.small_lane
+    assert scheduler.lane_for(4000 * 3000) is scheduler.large_lane
+
+
+def test_lane_runs_shortest_job_first():
+    lane, order, jobs, _ = _run_lane(
+        [((9_000_000, None), 0.0), ((100_000, None), 0.0), ((2_000_000, None), 0.0)],
+        lambda job: job.cost
+    )
+
+    assert [job.cost for job in order] == [100_000, 2_000_000, 9_000_000]
+    assert lane.get_stats()["completed"] == 4
+
+
+def test_lane_ages_long_waiting_jobs(monkeypatch):
+    monkeypatch.setattr(scheduler_module, "JOB_AGING_PIXELS_PER_SECOND", 1_000_000)
+
+    # Large job has waited 60s, long enough to outrank a fresh small one
+    _, order, _, _ = _run_lane(
+        [((100_000, None), 0.0), ((16_000_000, None), -60.0)],
+        lambda job: job.cost
+    )
+
+    assert [job.cost for job in order] == [16_000_000, 100_000]
+
+
+def test_lane_without_aging_orders_by_cost_only(monkeypatch):
+    monkeypatch.setattr(scheduler_module, "JOB_AGING_PIXELS_PER_SECOND", 0)
+
+    _, order, _, _ = _run_lane(
+        [((100_000, None), 0.0), ((16_000_000, None), -60.0)],
+        lambda job: job.cost
+    )
+
+    assert [job.cost for job in order] == [100_000, 16_000_000]
+
+
+def test_lane_skips_queued_job_past_deadline():
+    lane, order, jobs, results = _run_lane(
+        [((100_000, time.time() - 1), 0.0), ((200_000, None), 0.0)],
+        lambda job: "ok"
+    )
+
+    assert isinstance(results[0], RequestTimeoutError)
+    assert results[1] == "ok"
+    assert jobs[0] not in order
+    assert lane.get_stats()["skipped"] == 1
+
+
+@pytest.mark.parametrize("value", ["abc", "0", "-5", "nan", "inf", "1e309"])
+def test_parse_deadline_rejects_invalid_values(value):
+    with pytest.raises(APIException) as exc_info:
+        parse_deadline(value, 100.0)
+
+    assert exc_info.value.status_code == 400
+
+
+def test_parse_deadline_is_relative_to_receipt():
+    assert parse_deadline("2.5", 100.0) == 102.5
+
+
+def test_parse_deadline_defaults_to_no_deadline():
+    assert parse_deadline(None, 100.0) is None
+
+
+def test_run_cancels_job_when_awaiting_task_is_cancelled():
+    started = threading.Event()
+    outcome = {}
+
+    def handler(job):
+        started.set()
+        while True:
+            try:
+                job.checkpoint()
+            except RequestCancelledError as e:
+                outcome["error"] = e
+                raise
+            time.sleep(0.01)
+
+    class Request:
+        async def is_disconnected(self):
+            return False
+
+    async def main():
+        scheduler = RequestScheduler(handler)
+        task = asyncio.create_task(scheduler.run(Request(), b"", 320, 320, None))
+        await asyncio.get_running_loop().run_in_executor(None, started.wait)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # Give the worker a moment to observe the cancellation
+        await asyncio.sleep(0.1)
+        return scheduler
+
+    scheduler = asyncio.run(main())
+
+    assert isinstance(outcome["error"], RequestCancelledError)
+    assert scheduler.small_lane.get_stats()["aborted"] == 1
+
+
+def test_run_drops_job_when_client_disconnects_mid_job(monkeypatch):
+    from app import pipeline as pipeline_module
+    from app.pipeline import Pipeline
+
+    detect_started = threading.Event()
+    recognized = []
+
+    def detect_plates(image_np):
+        detect_started.set()
+        time.sleep(0.3)
+        return [{"bbox": [0, 0, 10, 10], "confidence": 0.9}]
+
+    monkeypatch.setattr(pipeline_module, "decode_image", lambda image_bytes: (image_bytes, 1.0))
+    monkeypatch.setattr(pipeline_module, "detect_plates", detect_plates)
+    monkeypatch.setattr(pipeline_module, "crop_plates", lambda image_np, detections: detections)
+    monkeypatch.setattr(
+        pipeline_module, "recognize_plates",
+        lambda crops, scale_factor, checkpoint: recognized.append(crops) or []
+    )
+
+    class Request:
+        async def is_disconnected(self):
+            # Client goes away once detection is under way
+            return detect_started.is_set()
+
+    async def main():
+        scheduler = RequestScheduler(Pipeline().process)
+        with pytest.raises(RequestCancelledError):
+            await scheduler.run(Request(), b"", 320, 320, None)
+        return scheduler
+
+    scheduler = asyncio.run(main())
+
+    # The lane worker finishes once the pipeline drops the job after detection
+    for _ in range(100):
+        if scheduler.small_lane.get_stats()["aborted"]:
+            break
+        time.sleep(0.01)
+    assert scheduler.small_lane.get_stats()["aborted"] == 1
+    assert recognized == []
@@ -0,0 +1,32 @@
+import io
+
+import pytest
+
+pytest.importorskip("PIL")
+
+from PIL import Image
+
+from app.exceptions import InvalidImageError
+from app.utils import validate_image
+
+
+def _png_bytes(width, height):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), "white").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_validate_image_returns_dimensions():
+    assert validate_image(_png_bytes(640, 480), "car.png") == (640, 480)
+
+
+def test_validate_image_rejects_corrupt_data():
+    corrupt = _png_bytes(640, 480)[:100]
+
+    with pytest.raises(InvalidImageError):
+        validate_image(corrupt, "car.png")
+
+
+def test_validate_image_rejects_too_small_image():
+    with pytest.raises(InvalidImageError, match="too small"):
+        validate_image(_png_bytes(100, 100), "car.png")